@@ -1,7 +1,16 @@
 import streamlit as st
-import requests
 import time
 import random
+import os
+import json
+
+import joblib
+import pandas as pd
+
+from cube import ALL, DIMENSIONS, CohortCube
+from drift import KS_ALERT, PSI_ALERT, PSI_WARN, DriftMonitor, DriftSketch
+from schema import SIDEBAR_RANGES, InputSchema
+from scoring import HedgedScorer, ShadowScorer, calculate_local_probability, confidence_tier, local_backend, remote_backend
 
 st.set_page_config(layout="wide")
 
@@ -16,6 +25,102 @@ headers = {
     "Content-Type": "application/json"
 }
 
+# Bundled scikit-learn pipeline (preprocess + logistic regression).
+# Point MODEL_PATH at a versioned artifact from train.py to serve a retrained model.
+MODEL_PATH = os.environ.get(
+    "MODEL_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "best_retention_model.joblib"),
+)
+
+
+@st.cache_resource
+def load_local_model():
+    return joblib.load(MODEL_PATH)
+
+
+@st.cache_resource
+def load_input_schema():
+    """Validation schema compiled once from the local model artifact."""
+    return InputSchema.from_pipeline(load_local_model())
+
+
+# Shadow mode: every prediction also goes to the local model in parallel so
+# the two backends can be compared before traffic moves off Databricks.
+SHADOW_SCORING = os.environ.get("SHADOW_SCORING", "1") == "1"
+
+
+@st.cache_resource
+def load_shadow_scorer():
+    return ShadowScorer(
+        primary=remote_backend(ENDPOINT_URL, headers),
+        shadow=local_backend(load_local_model()),
+    )
+
+
+# Hedging: if Databricks hasn't answered by the deadline, answer with the
+# local model instead. Leave HEDGE_DEADLINE_SECONDS unset to track the
+# observed p95 of the remote endpoint.
+HEDGING = os.environ.get("HEDGING", "1") == "1"
+HEDGE_DEADLINE_SECONDS = os.environ.get("HEDGE_DEADLINE_SECONDS")
+
+
+def primary_backend():
+    """The Databricks endpoint, shadowed by the local model when enabled."""
+    if SHADOW_SCORING:
+        return load_shadow_scorer().predict
+    return remote_backend(ENDPOINT_URL, headers)
+
+
+@st.cache_resource
+def load_hedged_scorer():
+    return HedgedScorer(
+        primary=primary_backend(),
+        fallback=local_backend(load_local_model()),
+        deadline_s=float(HEDGE_DEADLINE_SECONDS) if HEDGE_DEADLINE_SECONDS else None,
+    )
+
+
+# Drift monitoring: live inputs are sketched per window and compared with a
+# reference, e.g. the .reference.json that train.py writes next to an artifact.
+DRIFT_REFERENCE_PATH = os.environ.get("DRIFT_REFERENCE_PATH")
+
+
+@st.cache_resource
+def load_drift_monitor():
+    monitor = DriftMonitor()
+    if DRIFT_REFERENCE_PATH and os.path.exists(DRIFT_REFERENCE_PATH):
+        with open(DRIFT_REFERENCE_PATH) as handle:
+            monitor.set_reference(DriftSketch.from_dict(json.load(handle)))
+    return monitor
+
+
+def score_records(records):
+    """Score records with the Databricks endpoint (hedged and/or shadowed when enabled)."""
+    drift_monitor = load_drift_monitor()
+    for record in records:
+        drift_monitor.observe(record)
+
+    if HEDGING:
+        return load_hedged_scorer().predict(records)
+    return primary_backend()(records)
+
+
+@st.cache_resource
+def load_cohort_cube():
+    return CohortCube()
+
+
+def local_probabilities(records):
+    """Renewal probabilities from the local model for a list of records."""
+    model = load_local_model()
+    frame = pd.DataFrame.from_records(records, columns=model.feature_names_in_)
+    return model.predict_proba(frame)[:, 1]
+
+
+def record_scored(frame):
+    """Fold scored rows (features + prediction/heuristic_score/probability) into the cohort cube."""
+    load_cohort_cube().update(frame)
+
 
 
 
@@ -119,42 +224,12 @@ div.stButton > button:first-child:hover {
     unsafe_allow_html=True,
 )
 
-# ----------------------------------------------------
-# Helper function — local renewal probability
-# ----------------------------------------------------
-def calculate_local_probability(features):
-    """Generate a pseudo-probability score based on user inputs."""
-    score = 0
-
-    # Positive factors
-    if features["is_current_customer"] == 1:
-        score += 20
-    if features["tenure_months"] > 12:
-        score += 15
-    if features["emails_opened_last_30d"] > 5:
-        score += 15
-    if features["past_positive_replies"] > 0:
-        score += 10
-    if features["tag_high_priority"] == 1:
-        score += 10
-
-    # Negative factors
-    if features["avg_response_time_hours"] > 24:
-        score -= 15
-    if features["last_interaction_days_ago"] > 20:
-        score -= 20
-    if features["total_tickets_last_6mo"] > 5:
-        score -= 10
-
-    # Keep in range 5–95%
-    score = max(5, min(score, 95))
-    return score
-
-
 # ----------------------------------------------------
 # Tabs
 # ----------------------------------------------------
-tab1, tab2 = st.tabs(["🔮 Prediction App", "📘 About the Model"])
+tab1, tab2, tab3, tab4, tab5 = st.tabs(
+    ["🔮 Prediction App", "📘 About the Model", "📂 Batch Scoring", "🛠️ Admin", "📊 Cohorts"]
+)
 
 
 # ----------------------------------------------------
@@ -175,20 +250,20 @@ with tab1:
     region = st.sidebar.selectbox("Region", ["South", "West", "Midwest", "Northeast"])
     channel = st.sidebar.selectbox("Channel", ["email", "sms"])
     company_size = st.sidebar.selectbox("Company size", ["Small", "Medium", "Enterprise"])
-    tenure_months = st.sidebar.number_input("Tenure (months)", 0, 200, 12)
+    tenure_months = st.sidebar.number_input("Tenure (months)", *SIDEBAR_RANGES["tenure_months"], 12)
 
     is_current_label = st.sidebar.selectbox("Current customer?", ["Yes", "No"])
     is_current_customer = 1 if is_current_label == "Yes" else 0
 
-    total_tickets_last_6mo = st.sidebar.number_input("Tickets (last 6 months)", 0, 50, 2)
-    avg_response_time_hours = st.sidebar.number_input("Avg response time (hours)", 0.0, 100.0, 3.5)
+    total_tickets_last_6mo = st.sidebar.number_input("Tickets (last 6 months)", *SIDEBAR_RANGES["total_tickets_last_6mo"], 2)
+    avg_response_time_hours = st.sidebar.number_input("Avg response time (hours)", *SIDEBAR_RANGES["avg_response_time_hours"], 3.5)
 
-    emails_sent_last_30d = st.sidebar.number_input("Emails sent (30 days)", 0, 100, 15)
-    emails_opened_last_30d = st.sidebar.number_input("Emails opened (30 days)", 0, 100, 10)
-    emails_clicked_last_30d = st.sidebar.number_input("Emails clicked (30 days)", 0, 100, 3)
+    emails_sent_last_30d = st.sidebar.number_input("Emails sent (30 days)", *SIDEBAR_RANGES["emails_sent_last_30d"], 15)
+    emails_opened_last_30d = st.sidebar.number_input("Emails opened (30 days)", *SIDEBAR_RANGES["emails_opened_last_30d"], 10)
+    emails_clicked_last_30d = st.sidebar.number_input("Emails clicked (30 days)", *SIDEBAR_RANGES["emails_clicked_last_30d"], 3)
 
-    past_positive_replies = st.sidebar.number_input("Past positive replies", 0, 20, 1)
-    last_interaction_days_ago = st.sidebar.number_input("Days since last interaction", 0, 36, 11)
+    past_positive_replies = st.sidebar.number_input("Past positive replies", *SIDEBAR_RANGES["past_positive_replies"], 1)
+    last_interaction_days_ago = st.sidebar.number_input("Days since last interaction", *SIDEBAR_RANGES["last_interaction_days_ago"], 11)
 
     tag_high_label = st.sidebar.selectbox("High priority tag?", ["Yes", "No"])
     tag_high_priority = 1 if tag_high_label == "Yes" else 0
@@ -239,9 +314,7 @@ with tab1:
 
         # Call Databricks endpoint
         try:
-            response = requests.post(ENDPOINT_URL, headers=headers, json=payload)
-            response.raise_for_status()
-            result = response.json()
+            result = score_records(payload["dataframe_records"])
         except Exception as e:
             loader_placeholder.empty()
             st.markdown('<div class="result-card error-card">❌ Error calling prediction API.</div>', unsafe_allow_html=True)
@@ -258,6 +331,12 @@ with tab1:
             st.json(result)
             st.stop()
 
+        if result.get("fallback"):
+            st.caption(
+                f"⚡ Databricks took longer than {result['deadline_s'] * 1000:.0f} ms — "
+                "this answer comes from the local model."
+            )
+
         # Summary card
         st.markdown(
             f"""
@@ -307,12 +386,14 @@ with tab1:
         )
 
         # Confidence level
-        if local_prob >= 70:
-            confidence = "High Confidence"
-        elif local_prob >= 40:
-            confidence = "Medium Confidence"
-        else:
-            confidence = "Low Confidence"
+        confidence = f"{confidence_tier(local_prob)} Confidence"
+
+        record_scored(pd.DataFrame([{
+            **payload["dataframe_records"][0],
+            "prediction": int(pred == 1),
+            "heuristic_score": local_prob,
+            "probability": local_probabilities(payload["dataframe_records"])[0],
+        }]))
 
         st.markdown(f"<p style='color:gray; font-size:14px;'>Confidence: <b>{confidence}</b></p>", unsafe_allow_html=True)
 
@@ -542,6 +623,211 @@ with tab2:
         unsafe_allow_html=True,
     )
 
+# ----------------------------------------------------
+# TAB 3 — BATCH SCORING
+# ----------------------------------------------------
+with tab3:
+    st.markdown("### 📂 Score a CSV of contacts")
+    st.markdown(
+        "Rows are checked against the model's input schema first. "
+        "Rows that fail are set aside with a reason instead of failing the whole batch."
+    )
+
+    uploaded = st.file_uploader("Contacts CSV", type=["csv"], key="batch_upload")
+
+    if uploaded is not None:
+        batch_df = pd.read_csv(uploaded)
+        validation = load_input_schema().validate(batch_df)
+
+        col_ok, col_bad = st.columns(2)
+        col_ok.metric("Valid rows", len(validation.valid))
+        col_bad.metric("Rejected rows", len(validation.rejects))
+
+        # Reruns keep the upload around; count each file once.
+        first_run = st.session_state.get("batch_recorded") != uploaded.file_id
+        if first_run:
+            # Sketch the raw upload, rejects included: unseen categories and
+            # out-of-range values are exactly the drift worth seeing.
+            load_drift_monitor().update(batch_df)
+            st.session_state["batch_recorded"] = uploaded.file_id
+
+        if len(validation.valid) > 0:
+            scored = validation.valid.copy()
+            proba = load_local_model().predict_proba(validation.valid)[:, 1]
+            scored["renewal_probability"] = proba.round(4)
+            scored["prediction"] = (proba >= 0.5).astype(int)
+            scored["heuristic_score"] = calculate_local_probability(scored)
+
+            if first_run:
+                record_scored(scored.assign(probability=proba))
+
+            st.dataframe(scored.head(200))
+            st.download_button(
+                "Download scored rows",
+                scored.to_csv(index=False),
+                file_name="scored_contacts.csv",
+                mime="text/csv",
+            )
+
+        if len(validation.rejects) > 0:
+            with st.expander("🚫 Rejected rows"):
+                st.dataframe(validation.rejects.head(200))
+                st.download_button(
+                    "Download rejected rows",
+                    validation.rejects.to_csv(index=False),
+                    file_name="rejected_contacts.csv",
+                    mime="text/csv",
+                )
+
+# ----------------------------------------------------
+# TAB 4 — ADMIN
+# ----------------------------------------------------
+with tab4:
+    st.markdown("### 👥 Shadow Scoring — Databricks vs local model")
+
+    if not SHADOW_SCORING:
+        st.info("Shadow scoring is off. Set SHADOW_SCORING=1 to compare backends.")
+    else:
+        shadow_scorer = load_shadow_scorer()
+        summary = shadow_scorer.summary()
+        agreement = summary["agreement_rate"]
+
+        col_n, col_agree, col_err = st.columns(3)
+        col_n.metric("Predictions compared", summary["compared"])
+        col_agree.metric("Agreement rate", "—" if agreement is None else f"{agreement:.1%}")
+        col_err.metric(
+            "Errors (remote / local)",
+            f"{summary['errors'][shadow_scorer.primary_name]} / {summary['errors'][shadow_scorer.shadow_name]}",
+        )
+
+        st.markdown("#### ⏱️ Latency by backend")
+        for name in (shadow_scorer.primary_name, shadow_scorer.shadow_name):
+            mean_ms = summary["mean_ms"][name]
+            p95_ms = summary["p95_ms"][name]
+            st.markdown(
+                f"**{name}** — mean: {'—' if mean_ms is None else f'{mean_ms:.0f} ms'}, "
+                f"p95: {shadow_scorer.latency[name].format_ms(p95_ms)}"
+            )
+        st.bar_chart(shadow_scorer.latency_frame())
+
+        st.markdown("#### ⚠️ Recent disagreements")
+        disagreements = shadow_scorer.disagreement_frame()
+        if disagreements.empty:
+            st.markdown("No disagreements recorded yet.")
+        else:
+            st.dataframe(disagreements.iloc[::-1])
+
+    st.markdown("### ⚡ Hedged Requests — local fallback after a deadline")
+
+    if not HEDGING:
+        st.info("Hedging is off. Set HEDGING=1 to cap remote latency with the local model.")
+    else:
+        hedged_scorer = load_hedged_scorer()
+        hedge = hedged_scorer.summary()
+        deadline_labels = {
+            "fixed": "fixed",
+            "default": f"default, warming up {hedge['deadline_samples']}/{hedged_scorer.warmup}",
+            "observed": f"observed p{hedged_scorer.quantile * 100:.0f}",
+        }
+
+        col_req, col_rate, col_deadline, col_saved = st.columns(4)
+        col_req.metric("Requests", hedge["requests"])
+        col_rate.metric("Hedge rate", "—" if hedge["hedge_rate"] is None else f"{hedge['hedge_rate']:.1%}")
+        col_deadline.metric(
+            "Current deadline",
+            f"{hedge['deadline_ms']:.0f} ms ({deadline_labels[hedge['deadline_source']]})",
+        )
+        col_saved.metric(
+            "Mean latency saved",
+            "—" if hedge["saved_ms_mean"] is None else f"{hedge['saved_ms_mean']:.0f} ms",
+        )
+
+        late_agreement = hedge["late_agreement_rate"]
+        st.markdown(
+            f"Late remote replies: **{hedge['late_replies']}** "
+            f"(agreed with the fallback: {'—' if late_agreement is None else f'{late_agreement:.1%}'}, "
+            f"errors: {hedge['late_errors']}) · "
+            f"Remote failures before the deadline: **{hedge['primary_errors']}** · "
+            f"Total latency saved: **{hedge['saved_ms_total'] / 1000:.1f} s**"
+        )
+        st.bar_chart(hedged_scorer.latency.to_frame().rename(columns={"count": "remote"}))
+
+    st.markdown("### 📈 Input Drift — live inputs vs reference")
+
+    drift_monitor = load_drift_monitor()
+    windows = drift_monitor.windows()
+
+    if st.button("Use live inputs as reference", key="drift_set_reference"):
+        drift_monitor.set_reference(drift_monitor.merged())
+        st.rerun()
+
+    if drift_monitor.reference is None:
+        st.info(
+            "No reference snapshot yet. Set DRIFT_REFERENCE_PATH to a .reference.json from train.py, "
+            "or use the button above to freeze the inputs seen so far."
+        )
+    elif not windows:
+        st.markdown("No inputs scored yet.")
+    else:
+        col_win, col_warn, col_alert, col_ks = st.columns(4)
+        last = col_win.number_input("Windows (hours) to compare", 1, len(windows), 1, key="drift_windows")
+        psi_warn = col_warn.number_input("PSI watch", 0.0, 5.0, PSI_WARN, 0.05, key="drift_psi_warn")
+        psi_alert = col_alert.number_input("PSI drift", 0.0, 5.0, PSI_ALERT, 0.05, key="drift_psi_alert")
+        ks_alert = col_ks.number_input("KS drift", 0.0, 1.0, KS_ALERT, 0.05, key="drift_ks_alert")
+
+        drift = drift_monitor.report(last=last, psi_warn=psi_warn, psi_alert=psi_alert, ks_alert=ks_alert)
+        drifting = drift.index[drift["status"] == "drift"].tolist()
+
+        st.markdown(
+            f"Compared **{sum(count for _, count in windows[-last:])}** live records "
+            f"with **{drift_monitor.reference.count}** reference records."
+        )
+        if drifting:
+            st.markdown(
+                f'<div class="result-card error-card">⚠️ Drift detected: {", ".join(drifting)}</div>',
+                unsafe_allow_html=True,
+            )
+        st.dataframe(drift)
+        st.bar_chart(drift["psi"])
+
+# ----------------------------------------------------
+# TAB 5 — COHORT BREAKDOWN
+# ----------------------------------------------------
+with tab5:
+    st.markdown("### 📊 Renewal Likelihood by Cohort")
+
+    cohort_cube = load_cohort_cube()
+
+    # Pick a slice; anything left on "All" is rolled up.
+    filters = {}
+    for filter_col, dim in zip(st.columns(len(DIMENSIONS)), DIMENSIONS):
+        label = dim.replace("_", " ").capitalize()
+        filters[dim] = filter_col.selectbox(label, [ALL] + list(cohort_cube.values[dim]), key=f"cohort_{dim}")
+
+    totals = cohort_cube.cell(**filters)
+    col_n, col_rate, col_score, col_prob = st.columns(4)
+    col_n.metric("Scored contacts", totals["contacts"])
+    col_rate.metric("Predicted to renew", "—" if not totals["contacts"] else f"{totals['renew_rate']:.1%}")
+    col_score.metric("Mean heuristic score", "—" if not totals["contacts"] else f"{totals['mean_heuristic_score']:.0f}%")
+    col_prob.metric(
+        "Mean model probability",
+        "—" if pd.isna(totals["mean_probability"]) else f"{totals['mean_probability']:.1%}",
+    )
+
+    by = st.selectbox(
+        "Break down by",
+        [dim for dim in DIMENSIONS if filters[dim] == ALL] or list(DIMENSIONS),
+        format_func=lambda dim: dim.replace("_", " ").capitalize(),
+        key="cohort_by",
+    )
+    breakdown = cohort_cube.breakdown(by, **filters)
+
+    if breakdown.empty:
+        st.markdown("No scored contacts in this cohort yet.")
+    else:
+        st.dataframe(breakdown)
+        st.bar_chart(breakdown.drop(index=ALL, errors="ignore")[["renew_rate", "mean_probability"]])
+
 # -------------------------------
 # MINI GAME FOOTER (WORKING)
 # -------------------------------
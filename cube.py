@@ -0,0 +1,165 @@
+"""Cohort aggregate cube over scored contacts.
+
+Renewal breakdowns by industry × region × company_size × channel are kept as a
+dense array with one extra "All" slot on every axis, so every roll-up (all 16
+combinations of fixed and aggregated dimensions) is precomputed. New
+predictions are folded in incrementally: a batch is first reduced to its base
+cells with ``np.bincount``, then rolled up along each axis and added in.
+Reading any drill-down view is plain array indexing.
+"""
+
+import threading
+
+import numpy as np
+import pandas as pd
+
+from scoring import CONFIDENCE_TIERS
+
+
+DIMENSIONS = ("industry", "region", "company_size", "channel")
+ALL = "All"
+# Rows with no value for a dimension are grouped under this label.
+MISSING = "(missing)"
+
+TIER_NAMES = tuple(tier for tier, _ in CONFIDENCE_TIERS)
+MEASURES = ("count", "renew_count", "score_sum", "prob_sum", "prob_count") + tuple(
+    f"tier_{tier}" for tier in TIER_NAMES
+)
+
+
+def _tier_indices(scores):
+    """Index into ``TIER_NAMES`` for each heuristic score."""
+    conditions = [scores >= minimum for _, minimum in CONFIDENCE_TIERS]
+    return np.select(conditions, np.arange(len(CONFIDENCE_TIERS)), default=len(CONFIDENCE_TIERS) - 1)
+
+
+class CohortCube:
+    """Incrementally maintained aggregate cube. Safe to share across threads."""
+
+    def __init__(self, dimensions=DIMENSIONS):
+        self.dimensions = tuple(dimensions)
+        # Slot 0 on every axis is the "All" roll-up; values start at slot 1.
+        self.values = {dim: [] for dim in self.dimensions}
+        self._positions = {dim: {} for dim in self.dimensions}
+        self._cube = np.zeros((1,) * len(self.dimensions) + (len(MEASURES),))
+        self._lock = threading.Lock()
+
+    # ------------------------------------------------
+    # Updates
+    # ------------------------------------------------
+    def update(self, frame):
+        """Fold a batch of scored rows into the cube.
+
+        ``frame`` needs the dimension columns plus ``prediction`` (0/1),
+        ``heuristic_score`` and, optionally, ``probability`` (NaN when unknown).
+        Missing dimension values are counted under ``MISSING``.
+        """
+        if len(frame) == 0:
+            return
+
+        prediction = frame["prediction"].to_numpy(dtype=np.float64)
+        score = frame["heuristic_score"].to_numpy(dtype=np.float64)
+        if "probability" in frame:
+            probability = frame["probability"].to_numpy(dtype=np.float64)
+        else:
+            probability = np.full(len(frame), np.nan)
+        has_prob = ~np.isnan(probability)
+        tiers = _tier_indices(score)
+
+        weights = [
+            np.ones(len(frame)),
+            prediction,
+            score,
+            np.where(has_prob, probability, 0.0),
+            has_prob.astype(np.float64),
+        ] + [(tiers == i).astype(np.float64) for i in range(len(TIER_NAMES))]
+
+        with self._lock:
+            codes = [self._encode(dim, frame[dim]) for dim in self.dimensions]
+            shape = self._cube.shape[:-1]
+
+            # Reduce the batch to its base cells (no "All" slots yet).
+            flat = np.ravel_multi_index(codes, shape)
+            size = int(np.prod(shape))
+            delta = np.stack([np.bincount(flat, weights=w, minlength=size) for w in weights], axis=-1)
+            delta = delta.reshape(shape + (len(MEASURES),))
+
+            # Roll up one axis at a time; after the last axis every
+            # combination of "All" slots holds its aggregate.
+            for axis in range(len(self.dimensions)):
+                index = [slice(None)] * delta.ndim
+                index[axis] = 0
+                rest = [slice(None)] * delta.ndim
+                rest[axis] = slice(1, None)
+                delta[tuple(index)] = delta[tuple(rest)].sum(axis=axis)
+
+            self._cube += delta
+
+    def _encode(self, dim, column):
+        """Cube positions for a column, growing the axis for unseen values."""
+        # factorize gives missing values code -1, which would index the last value.
+        codes, uniques = pd.factorize(column.astype(object).fillna(MISSING).astype(str))
+        positions = self._positions[dim]
+        new_values = [value for value in uniques if value not in positions]
+        if new_values:
+            for value in new_values:
+                self.values[dim].append(value)
+                positions[value] = len(self.values[dim])
+            axis = self.dimensions.index(dim)
+            pad = [(0, 0)] * self._cube.ndim
+            pad[axis] = (0, len(new_values))
+            self._cube = np.pad(self._cube, pad)
+        lookup = np.array([positions[value] for value in uniques], dtype=np.intp)
+        return lookup[codes]
+
+    # ------------------------------------------------
+    # Reads
+    # ------------------------------------------------
+    def _index(self, filters):
+        index = []
+        for dim in self.dimensions:
+            value = filters.get(dim, ALL)
+            if value == ALL:
+                index.append(0)
+            elif value in self._positions[dim]:
+                index.append(self._positions[dim][value])
+            else:
+                return None
+        return index
+
+    def cell(self, **filters):
+        """Aggregates for one cell; unspecified dimensions are rolled up."""
+        with self._lock:
+            index = self._index(filters)
+            sums = self._cube[tuple(index)] if index is not None else np.zeros(len(MEASURES))
+            return _summarise(sums[np.newaxis, :])[0]
+
+    def breakdown(self, by, **filters):
+        """One row per value of ``by`` (plus its "All" total), other dimensions fixed by ``filters``."""
+        with self._lock:
+            index = self._index({**filters, by: ALL})
+            labels = [ALL] + list(self.values[by])
+            if index is None:
+                sums = np.zeros((len(labels), len(MEASURES)))
+            else:
+                index[self.dimensions.index(by)] = slice(None)
+                sums = self._cube[tuple(index)].copy()
+        frame = pd.DataFrame(_summarise(sums), index=pd.Index(labels, name=by))
+        return frame[frame["contacts"] > 0]
+
+
+def _summarise(sums):
+    """Turn raw measure sums into display rows."""
+    sums = dict(zip(MEASURES, np.asarray(sums, dtype=np.float64).T))
+    count = sums["count"]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        rows = {
+            "contacts": count.astype(np.int64),
+            "predicted_renew": sums["renew_count"].astype(np.int64),
+            "renew_rate": sums["renew_count"] / count,
+            "mean_heuristic_score": sums["score_sum"] / count,
+            "mean_probability": sums["prob_sum"] / sums["prob_count"],
+        }
+    for tier in TIER_NAMES:
+        rows[f"{tier} confidence"] = sums[f"tier_{tier}"].astype(np.int64)
+    return pd.DataFrame(rows).to_dict("records")
@@ -0,0 +1,265 @@
+"""Streaming feature drift monitor.
+
+Every scored record is folded into a constant-memory ``DriftSketch``:
+fixed-bin histograms for the 11 numeric inputs (bins come from the sidebar
+ranges, plus under/overflow) and capped value counts for the 4 categoricals.
+Sketches are kept per time window in a bounded ring, and any window can be
+compared against a reference sketch with PSI (all features) and a binned KS
+statistic (numeric features).
+
+``DriftMonitor.observe`` is the per-record path: a bisect per numeric field and
+a dict increment per categorical, a few microseconds in total. Batches go
+through ``update``, which bins whole columns with NumPy.
+"""
+
+import bisect
+import math
+import threading
+import time
+from collections import deque
+
+import numpy as np
+import pandas as pd
+
+from schema import SIDEBAR_RANGES, YES_NO_COLUMNS, YES_NO_VALUES
+
+
+NUMERIC_FEATURES = tuple(col for col in SIDEBAR_RANGES if col != "contact_id")
+CATEGORICAL_FEATURES = ("industry", "region", "company_size", "channel")
+
+# Integer inputs spanning up to this many values get one bin per value.
+MAX_BINS = 20
+# Distinct values tracked per categorical before folding into OTHER.
+MAX_CATEGORIES = 50
+OTHER = "__other__"
+# Categorical value recorded for a missing entry (None/NaN).
+MISSING = "__missing__"
+
+# Common PSI rules of thumb: below 0.1 stable, above 0.25 significant shift.
+PSI_WARN = 0.1
+PSI_ALERT = 0.25
+KS_ALERT = 0.1
+
+_EPS = 1e-4
+
+
+def bin_edges(low, high):
+    """Edges for one numeric feature; values land in ``bisect_right(edges, x)``.
+
+    Bin 0 is underflow and the last bin is overflow, so every value is counted.
+    """
+    if isinstance(low, int) and isinstance(high, int) and high - low < MAX_BINS:
+        return [float(v) for v in range(low, high + 2)]
+    edges = np.linspace(low, high, MAX_BINS + 1).tolist()
+    edges[-1] = float(np.nextafter(high, np.inf))  # make ``high`` itself in range
+    return edges
+
+
+FEATURE_EDGES = {col: bin_edges(*SIDEBAR_RANGES[col]) for col in NUMERIC_FEATURES}
+
+
+class DriftSketch:
+    """Mergeable, fixed-size summary of a stream of feature records."""
+
+    def __init__(self):
+        self.count = 0
+        # Plain lists: indexing them is what keeps ``observe`` cheap.
+        self.numeric = {col: [0] * (len(edges) + 1) for col, edges in FEATURE_EDGES.items()}
+        self.missing = {col: 0 for col in NUMERIC_FEATURES}
+        self.categorical = {col: {} for col in CATEGORICAL_FEATURES}
+
+    def observe(self, record):
+        self.count += 1
+        for col, edges in FEATURE_EDGES.items():
+            value = record.get(col)
+            if col in YES_NO_COLUMNS and isinstance(value, str):
+                value = YES_NO_VALUES.get(value.strip().lower(), value)
+            try:
+                value = float(value)
+            except (TypeError, ValueError):
+                value = math.nan
+            if math.isnan(value):
+                self.missing[col] += 1
+            else:
+                self.numeric[col][bisect.bisect_right(edges, value)] += 1
+        for col, counts in self.categorical.items():
+            value = record.get(col)
+            value = MISSING if value is None or value is pd.NA or value != value else str(value)
+            if value not in counts and len(counts) >= MAX_CATEGORIES:
+                value = OTHER
+            counts[value] = counts.get(value, 0) + 1
+
+    def update(self, frame):
+        self.count += len(frame)
+        for col, edges in FEATURE_EDGES.items():
+            if col not in frame:
+                self.missing[col] += len(frame)
+                continue
+            values = pd.to_numeric(frame[col], errors="coerce")
+            if col in YES_NO_COLUMNS:
+                # The labels InputSchema accepts, so raw uploads bin like coerced rows.
+                values = values.fillna(frame[col].astype(str).str.strip().str.lower().map(YES_NO_VALUES))
+            values = values.to_numpy(dtype=np.float64, na_value=np.nan)
+            present = ~np.isnan(values)
+            self.missing[col] += int((~present).sum())
+            bins = np.searchsorted(edges, values[present], side="right")
+            added = np.bincount(bins, minlength=len(edges) + 1).tolist()
+            self.numeric[col] = [a + b for a, b in zip(self.numeric[col], added)]
+        for col, counts in self.categorical.items():
+            if col in frame:
+                tallies = frame[col].astype(object).fillna(MISSING).astype(str).value_counts().items()
+            else:
+                tallies = [(MISSING, len(frame))] if len(frame) else []
+            for value, n in tallies:
+                if value not in counts and len(counts) >= MAX_CATEGORIES:
+                    value = OTHER
+                counts[value] = counts.get(value, 0) + int(n)
+
+    def merge(self, other):
+        self.count += other.count
+        for col in NUMERIC_FEATURES:
+            self.numeric[col] = [a + b for a, b in zip(self.numeric[col], other.numeric[col])]
+            self.missing[col] += other.missing[col]
+        for col, counts in other.categorical.items():
+            for value, n in counts.items():
+                if value not in self.categorical[col] and len(self.categorical[col]) >= MAX_CATEGORIES:
+                    value = OTHER
+                self.categorical[col][value] = self.categorical[col].get(value, 0) + n
+        return self
+
+    def to_dict(self):
+        return {
+            "count": self.count,
+            "edges": FEATURE_EDGES,
+            "numeric": {col: list(counts) for col, counts in self.numeric.items()},
+            "missing": dict(self.missing),
+            "categorical": {col: dict(counts) for col, counts in self.categorical.items()},
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        if data.get("edges") != FEATURE_EDGES:
+            raise ValueError("Reference sketch was built with different bin edges")
+        sketch = cls()
+        sketch.count = data["count"]
+        sketch.numeric = {col: list(counts) for col, counts in data["numeric"].items()}
+        sketch.missing = dict(data["missing"])
+        sketch.categorical = {col: dict(counts) for col, counts in data["categorical"].items()}
+        return sketch
+
+
+# ----------------------------------------------------
+# Drift statistics
+# ----------------------------------------------------
+def psi(actual, expected):
+    """Population stability index between two aligned count vectors."""
+    actual = np.asarray(actual, dtype=np.float64)
+    expected = np.asarray(expected, dtype=np.float64)
+    if not actual.sum() or not expected.sum():
+        return None
+    a = np.maximum(actual / actual.sum(), _EPS)
+    e = np.maximum(expected / expected.sum(), _EPS)
+    return float(((a - e) * np.log(a / e)).sum())
+
+
+def ks(actual, expected):
+    """Kolmogorov–Smirnov statistic on binned counts."""
+    actual = np.asarray(actual, dtype=np.float64)
+    expected = np.asarray(expected, dtype=np.float64)
+    if not actual.sum() or not expected.sum():
+        return None
+    return float(np.abs(np.cumsum(actual) / actual.sum() - np.cumsum(expected) / expected.sum()).max())
+
+
+def compare(current, reference, psi_warn=PSI_WARN, psi_alert=PSI_ALERT, ks_alert=KS_ALERT):
+    """Per-feature PSI/KS of ``current`` against ``reference`` as a DataFrame.
+
+    Missing or unparseable numeric values are an extra PSI bin, so a column
+    that stops parsing shows up as drift. KS only compares parsed values.
+    """
+    rows = []
+    for col in NUMERIC_FEATURES:
+        rows.append({
+            "feature": col,
+            "type": "numeric",
+            "psi": psi(current.numeric[col] + [current.missing[col]],
+                       reference.numeric[col] + [reference.missing[col]]),
+            "ks": ks(current.numeric[col], reference.numeric[col]),
+        })
+    for col in CATEGORICAL_FEATURES:
+        values = sorted(set(current.categorical[col]) | set(reference.categorical[col]))
+        rows.append({
+            "feature": col,
+            "type": "categorical",
+            "psi": psi([current.categorical[col].get(v, 0) for v in values],
+                       [reference.categorical[col].get(v, 0) for v in values]),
+            "ks": None,
+        })
+
+    frame = pd.DataFrame(rows).set_index("feature")
+    psi_values = frame["psi"].astype(float)
+    ks_values = frame["ks"].astype(float)
+    frame["status"] = np.select(
+        [psi_values.isna(), (psi_values >= psi_alert) | (ks_values >= ks_alert), psi_values >= psi_warn],
+        ["no data", "drift", "watch"],
+        default="stable",
+    )
+    return frame
+
+
+# ----------------------------------------------------
+# Windowed monitor
+# ----------------------------------------------------
+class DriftMonitor:
+    """Per-window sketches of live inputs plus a reference to compare against.
+
+    Memory is bounded by ``max_windows`` sketches of fixed size.
+    """
+
+    def __init__(self, window_seconds=3600, max_windows=24, reference=None):
+        self.window_seconds = window_seconds
+        self.reference = reference
+        self._windows = deque(maxlen=max_windows)
+        self._lock = threading.Lock()
+
+    def _current(self, now):
+        start = now - now % self.window_seconds
+        if not self._windows or self._windows[-1][0] != start:
+            self._windows.append((start, DriftSketch()))
+        return self._windows[-1][1]
+
+    def observe(self, record, now=None):
+        """Fold one record (a dict) into the current window."""
+        now = time.time() if now is None else now
+        with self._lock:
+            self._current(now).observe(record)
+
+    def update(self, frame, now=None):
+        """Fold a batch of records (a DataFrame) into the current window."""
+        now = time.time() if now is None else now
+        with self._lock:
+            self._current(now).update(frame)
+
+    def windows(self):
+        """``(window_start, record_count)`` for each retained window, oldest first."""
+        with self._lock:
+            return [(start, sketch.count) for start, sketch in self._windows]
+
+    def merged(self, last=None):
+        """One sketch covering the most recent ``last`` windows (all by default)."""
+        with self._lock:
+            windows = list(self._windows)[-last:] if last else list(self._windows)
+            merged = DriftSketch()
+            for _, sketch in windows:
+                merged.merge(sketch)
+        return merged
+
+    def set_reference(self, sketch):
+        with self._lock:
+            self.reference = sketch
+
+    def report(self, last=1, **thresholds):
+        """Drift of the most recent ``last`` windows against the reference."""
+        if self.reference is None:
+            return None
+        return compare(self.merged(last), self.reference, **thresholds)
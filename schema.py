@@ -0,0 +1,207 @@
+"""Input schema for the retention model, compiled from the fitted artifact.
+
+The sidebar enforces ranges through ``number_input`` bounds, but rows that
+arrive from files or APIs go straight to the model. ``InputSchema`` checks and
+coerces a whole DataFrame column by column (no per-row Python loop) and hands
+back the rows the model can score plus a side table of rejects with reasons.
+"""
+
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+
+# ----------------------------------------------------
+# Bounds shared with the sidebar inputs in app.py
+# ----------------------------------------------------
+# (min, max) per numeric input; the sidebar ``number_input`` widgets in app.py
+# take their bounds from here. Integer bounds mean the column must hold whole
+# numbers, exactly like the int-typed ``number_input`` widgets. ``None`` leaves
+# that side unbounded.
+SIDEBAR_RANGES = {
+    "contact_id": (0, None),
+    "tenure_months": (0, 200),
+    "is_current_customer": (0, 1),
+    "total_tickets_last_6mo": (0, 50),
+    "avg_response_time_hours": (0.0, 100.0),
+    "emails_sent_last_30d": (0, 100),
+    "emails_opened_last_30d": (0, 100),
+    "emails_clicked_last_30d": (0, 100),
+    "past_positive_replies": (0, 20),
+    "last_interaction_days_ago": (0, 36),
+    "tag_high_priority": (0, 1),
+    "tag_new_lead": (0, 1),
+}
+
+# Yes/No selectboxes in the sidebar; batch files often carry the labels.
+YES_NO_COLUMNS = ("is_current_customer", "tag_high_priority", "tag_new_lead")
+YES_NO_VALUES = {"yes": 1, "no": 0, "true": 1, "false": 0, "y": 1, "n": 0}
+
+REASON_COLUMN = "reject_reason"
+
+# Integer columns are cast to int64; 2**63 is exactly representable as a float.
+INT64_LIMIT = float(2 ** 63)
+
+
+@dataclass
+class ValidationResult:
+    """Outcome of ``InputSchema.validate``.
+
+    ``valid`` holds the coerced rows in model column order, ``rejects`` the
+    original rows that failed plus a ``reject_reason`` column, and
+    ``reject_mask`` is aligned with the input rows.
+    """
+
+    valid: pd.DataFrame
+    rejects: pd.DataFrame
+    reject_mask: np.ndarray
+
+
+class InputSchema:
+    """Column-wise validator for records sent to the retention model."""
+
+    def __init__(self, columns, categories, ranges):
+        self.columns = list(columns)
+        self.categories = {col: list(cats) for col, cats in categories.items()}
+        self.ranges = {col: ranges.get(col, (None, None)) for col in self.columns if col not in self.categories}
+
+        # Compile the categorical vocabularies once; pd.Categorical does the
+        # membership test in C for every batch afterwards.
+        self._dtypes = {col: pd.CategoricalDtype(cats) for col, cats in self.categories.items()}
+
+    @classmethod
+    def from_pipeline(cls, pipeline, ranges=SIDEBAR_RANGES):
+        """Build the schema from a fitted preprocessing + model Pipeline."""
+        categories = {}
+        preprocess = pipeline.named_steps["preprocess"]
+        for _, transformer, cols in preprocess.transformers_:
+            if hasattr(transformer, "categories_"):
+                for col, cats in zip(cols, transformer.categories_):
+                    categories[col] = cats
+        return cls(pipeline.feature_names_in_, categories, ranges)
+
+    # ------------------------------------------------
+    # Per-column checks (each returns coerced values + failure masks)
+    # ------------------------------------------------
+    def _check_categorical(self, col, series, allow_unknown=False):
+        # String clean-up runs once per distinct value, then fans back out
+        # through the integer codes.
+        codes, uniques = pd.factorize(series, use_na_sentinel=True)
+        cleaned = pd.Index(uniques.astype(str)).str.strip()
+        positions = pd.Index(self.categories[col]).get_indexer(cleaned)
+
+        missing = codes == -1
+        unknown = ~missing & (np.append(positions, -1)[codes] == -1)
+        values = np.append(cleaned.to_numpy(dtype=object), None)[codes]
+        checks = [(f"{col}: missing", missing)]
+        if not allow_unknown:
+            checks.append((f"{col}: unknown category", unknown))
+        return values, checks
+
+    def _check_numeric(self, col, series):
+        if series.dtype == object or pd.api.types.is_string_dtype(series.dtype):
+            # Mixed/text columns: parse each distinct value once.
+            codes, uniques = pd.factorize(series, use_na_sentinel=True)
+            parsed = pd.to_numeric(pd.Series(uniques, dtype=object), errors="coerce")
+            if col in YES_NO_COLUMNS:
+                labels = pd.Series(uniques, dtype=object).astype(str).str.strip().str.lower().map(YES_NO_VALUES)
+                parsed = parsed.fillna(labels)
+            values = np.append(parsed.to_numpy(dtype=np.float64, na_value=np.nan), np.nan)[codes]
+        else:
+            values = pd.to_numeric(series, errors="coerce").to_numpy(dtype=np.float64, na_value=np.nan)
+
+        low, high = self.ranges[col]
+        not_numeric = np.isnan(values)
+        not_finite = np.isinf(values)
+        out_of_range = np.zeros(len(values), dtype=bool)
+        if low is not None:
+            out_of_range |= values < low
+        if high is not None:
+            out_of_range |= values > high
+        checks = [
+            (f"{col}: not numeric", not_numeric),
+            (f"{col}: not finite", not_finite),
+            (f"{col}: out of range", out_of_range & ~not_finite),
+        ]
+
+        if self._is_integer(col):
+            finite = ~not_numeric & ~not_finite
+            not_integer = finite & (np.floor(values) != values)
+            # Whole numbers that would overflow the int64 cast in ``validate``.
+            too_large = finite & ((values >= INT64_LIMIT) | (values < -INT64_LIMIT))
+            checks.append((f"{col}: not an integer", not_integer))
+            checks.append((f"{col}: exceeds int64", too_large))
+        return values, checks
+
+    def _is_integer(self, col):
+        low, high = self.ranges[col]
+        return isinstance(low, int) and (high is None or isinstance(high, int))
+
+    # ------------------------------------------------
+    # Batch validation
+    # ------------------------------------------------
+    def validate(self, df, allow_unknown=False):
+        """Validate and coerce ``df``; never raises on bad rows.
+
+        With ``allow_unknown`` an unseen category is passed through (the
+        encoder turns it into an all-zeros vector) instead of rejected.
+        """
+        n_rows = len(df)
+        coerced = {}
+        labels = []
+        masks = []
+
+        for col in self.columns:
+            if col not in df.columns:
+                labels.append(f"{col}: missing column")
+                masks.append(np.ones(n_rows, dtype=bool))
+                continue
+            if col in self.categories:
+                coerced[col], checks = self._check_categorical(col, df[col], allow_unknown)
+            else:
+                coerced[col], checks = self._check_numeric(col, df[col])
+            for label, mask in checks:
+                # Only checks that actually fired take part in the reasons.
+                if mask.any():
+                    labels.append(label)
+                    masks.append(mask)
+
+        reject_mask = np.logical_or.reduce(masks) if masks else np.zeros(n_rows, dtype=bool)
+        failed = np.column_stack([mask[reject_mask] for mask in masks]) if masks else np.zeros((0, 0), dtype=bool)
+
+        rejects = df.loc[reject_mask].copy()
+        rejects[REASON_COLUMN] = self._reasons(failed, labels)
+
+        keep = ~reject_mask
+        valid = {}
+        for col in self.columns:
+            values = coerced[col][keep] if col in coerced else np.empty(0)
+            if col in self.ranges and self._is_integer(col):
+                values = values.astype(np.int64)
+            valid[col] = values
+        valid = pd.DataFrame(valid, index=df.index[keep], copy=False)
+
+        return ValidationResult(valid=valid, rejects=rejects, reject_mask=reject_mask)
+
+    @staticmethod
+    def _reasons(failed_rows, labels):
+        """Join failure labels per rejected row.
+
+        Rows are grouped by their failure pattern first, so strings are built
+        once per distinct pattern rather than once per row.
+        """
+        if len(failed_rows) == 0:
+            return np.array([], dtype=object)
+        if failed_rows.shape[1] <= 64:
+            # Pack each row's flags into one integer and hash those.
+            packed = np.packbits(failed_rows, axis=1, bitorder="little")
+            packed = np.pad(packed, ((0, 0), (0, 8 - packed.shape[1])))
+            inverse, keys = pd.factorize(packed.view(np.uint64).ravel())
+            patterns = np.unpackbits(keys.view(np.uint8).reshape(-1, 8), axis=1, bitorder="little")
+            patterns = patterns[:, : failed_rows.shape[1]].astype(bool)
+        else:
+            patterns, inverse = np.unique(failed_rows, axis=0, return_inverse=True)
+        labels = np.asarray(labels, dtype=object)
+        texts = np.array(["; ".join(labels[pattern]) for pattern in patterns], dtype=object)
+        return texts[inverse.reshape(-1)]
@@ -0,0 +1,359 @@
+"""Prediction backends and shadow scoring between them.
+
+A backend is any callable that takes a list of feature records and returns a
+response shaped like the Databricks serving endpoint: ``{"predictions": [...]}``.
+``ShadowScorer`` fires the same records at a primary and a shadow backend in
+parallel, hands the primary's response straight back to the caller, and
+compares the two in the background once both have answered.
+
+The rule-based renewal score shown next to each prediction lives here too, so
+batch paths can compute it without going through the Streamlit script.
+"""
+
+import bisect
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+
+import numpy as np
+import pandas as pd
+import requests
+
+
+# Upper bucket edges in milliseconds; anything slower lands in the overflow bucket.
+LATENCY_BUCKETS_MS = (10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000)
+
+
+# Minimum heuristic score for each confidence tier, highest first.
+CONFIDENCE_TIERS = (("High", 70), ("Medium", 40), ("Low", 0))
+
+
+# ----------------------------------------------------
+# Heuristic renewal probability
+# ----------------------------------------------------
+def calculate_local_probability(features):
+    """Generate a pseudo-probability score based on user inputs.
+
+    ``features`` is a dict of scalars (one score) or a DataFrame (one score
+    per row).
+    """
+    score = (
+        # Positive factors
+        20 * (features["is_current_customer"] == 1)
+        + 15 * (features["tenure_months"] > 12)
+        + 15 * (features["emails_opened_last_30d"] > 5)
+        + 10 * (features["past_positive_replies"] > 0)
+        + 10 * (features["tag_high_priority"] == 1)
+        # Negative factors
+        - 15 * (features["avg_response_time_hours"] > 24)
+        - 20 * (features["last_interaction_days_ago"] > 20)
+        - 10 * (features["total_tickets_last_6mo"] > 5)
+    )
+
+    # Keep in range 5–95%
+    if np.ndim(score) == 0:
+        return max(5, min(int(score), 95))
+    return np.clip(np.asarray(score, dtype=np.int64), 5, 95)
+
+
+def confidence_tier(score):
+    """Confidence tier name for a heuristic score."""
+    for tier, minimum in CONFIDENCE_TIERS:
+        if score >= minimum:
+            return tier
+    return CONFIDENCE_TIERS[-1][0]
+
+
+# ----------------------------------------------------
+# Backends
+# ----------------------------------------------------
+def remote_backend(url, headers, timeout=60):
+    """Backend that posts records to a Databricks serving endpoint."""
+
+    def predict(records):
+        response = requests.post(url, headers=headers, json={"dataframe_records": records}, timeout=timeout)
+        response.raise_for_status()
+        return response.json()
+
+    return predict
+
+
+def local_backend(model):
+    """Backend that scores records with the bundled scikit-learn pipeline."""
+
+    def predict(records):
+        frame = pd.DataFrame.from_records(records, columns=model.feature_names_in_)
+        return {"predictions": model.predict(frame).tolist()}
+
+    return predict
+
+
+# ----------------------------------------------------
+# Latency histogram
+# ----------------------------------------------------
+class LatencyHistogram:
+    """Fixed-bucket latency histogram. Not thread-safe on its own."""
+
+    def __init__(self, buckets_ms=LATENCY_BUCKETS_MS):
+        self.buckets_ms = tuple(buckets_ms)
+        self.counts = [0] * (len(self.buckets_ms) + 1)
+        self.total = 0
+        self.sum_ms = 0.0
+
+    def record(self, seconds):
+        ms = seconds * 1000.0
+        self.counts[bisect.bisect_left(self.buckets_ms, ms)] += 1
+        self.total += 1
+        self.sum_ms += ms
+
+    def mean_ms(self):
+        return self.sum_ms / self.total if self.total else None
+
+    def quantile_ms(self, q):
+        """Upper edge of the bucket holding the q-th quantile.
+
+        None when nothing has been recorded; ``inf`` when the quantile falls in
+        the overflow bucket (slower than the last edge).
+        """
+        if not self.total:
+            return None
+        target = q * self.total
+        running = 0
+        for edge, count in zip(self.buckets_ms, self.counts):
+            running += count
+            if running >= target:
+                return edge
+        return float("inf")
+
+    def format_ms(self, value):
+        """Render a ``quantile_ms`` result for display."""
+        if value is None:
+            return "—"
+        if value == float("inf"):
+            return f">{self.buckets_ms[-1]} ms"
+        return f"≤{value} ms"
+
+    def to_frame(self):
+        labels = [f"≤{edge} ms" for edge in self.buckets_ms] + [f">{self.buckets_ms[-1]} ms"]
+        # Ordered categories keep the buckets in latency order when charted.
+        index = pd.CategoricalIndex(labels, categories=labels, ordered=True, name="bucket")
+        return pd.DataFrame({"count": self.counts}, index=index)
+
+
+# ----------------------------------------------------
+# Shadow scoring
+# ----------------------------------------------------
+class ShadowScorer:
+    """Score with a primary and a shadow backend concurrently.
+
+    The primary runs on the caller's thread and the shadow on a pool, so a
+    backed-up pool can never queue the primary. Only the primary's response
+    (or exception) reaches the caller, and the caller waits exactly as long as
+    the primary takes. Agreement counts, per-backend latency histograms and
+    recent disagreements are kept for the admin panel.
+    """
+
+    def __init__(self, primary, shadow, primary_name="remote", shadow_name="local",
+                 max_workers=8, max_disagreements=200):
+        self.primary_name = primary_name
+        self.shadow_name = shadow_name
+        self._backends = {primary_name: primary, shadow_name: shadow}
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="shadow")
+        self._lock = threading.Lock()
+
+        self.latency = {primary_name: LatencyHistogram(), shadow_name: LatencyHistogram()}
+        self.errors = {primary_name: 0, shadow_name: 0}
+        self.compared = 0
+        self.agreed = 0
+        self.disagreements = deque(maxlen=max_disagreements)
+
+    def predict(self, records):
+        shadow = self._pool.submit(self._timed, self.shadow_name, records)
+        result = self._timed(self.primary_name, records)
+
+        # Runs once the shadow finishes too; on the pool thread if it is slower.
+        shadow.add_done_callback(lambda done: self._compare(records, result, done))
+        return result
+
+    def _timed(self, name, records):
+        start = time.perf_counter()
+        try:
+            result = self._backends[name](records)
+        except Exception:
+            with self._lock:
+                self.errors[name] += 1
+            raise
+        elapsed = time.perf_counter() - start
+        with self._lock:
+            self.latency[name].record(elapsed)
+        return result
+
+    def _compare(self, records, primary, shadow):
+        if shadow.exception() is not None:
+            return
+        try:
+            primary_preds = primary["predictions"]
+            shadow_preds = shadow.result()["predictions"]
+        except (KeyError, TypeError):
+            return
+
+        now = time.strftime("%Y-%m-%d %H:%M:%S")
+        with self._lock:
+            for record, p, s in zip(records, primary_preds, shadow_preds):
+                self.compared += 1
+                if p == s:
+                    self.agreed += 1
+                else:
+                    self.disagreements.append(
+                        {"time": now, **record, self.primary_name: p, self.shadow_name: s}
+                    )
+
+    # ------------------------------------------------
+    # Snapshots for the admin panel
+    # ------------------------------------------------
+    def summary(self):
+        with self._lock:
+            return {
+                "compared": self.compared,
+                "agreement_rate": self.agreed / self.compared if self.compared else None,
+                "errors": dict(self.errors),
+                "mean_ms": {name: hist.mean_ms() for name, hist in self.latency.items()},
+                "p95_ms": {name: hist.quantile_ms(0.95) for name, hist in self.latency.items()},
+            }
+
+    def latency_frame(self):
+        with self._lock:
+            return pd.concat({name: hist.to_frame()["count"] for name, hist in self.latency.items()}, axis=1)
+
+    def disagreement_frame(self):
+        with self._lock:
+            return pd.DataFrame(list(self.disagreements))
+
+
+# ----------------------------------------------------
+# Hedged scoring
+# ----------------------------------------------------
+class HedgedScorer:
+    """Cap tail latency by falling back to a local backend after a deadline.
+
+    The primary is always called. If it has not answered by the deadline, the
+    fallback answers instead and the response is tagged ``"fallback": True``.
+    The primary's late reply is still awaited in the background and compared
+    with what was served. With no fixed ``deadline_s`` the deadline tracks the
+    ``quantile`` of recent primary latencies, clamped to
+    ``[min_deadline_s, max_deadline_s]``.
+    """
+
+    def __init__(self, primary, fallback, deadline_s=None, quantile=0.95, window=500, warmup=20,
+                 default_deadline_s=2.0, min_deadline_s=0.25, max_deadline_s=10.0, max_workers=8):
+        self._primary = primary
+        self._fallback = fallback
+        self.fixed_deadline_s = deadline_s
+        self.quantile = quantile
+        self.warmup = warmup
+        self.default_deadline_s = default_deadline_s
+        self.min_deadline_s = min_deadline_s
+        self.max_deadline_s = max_deadline_s
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="hedge")
+        self._lock = threading.Lock()
+
+        self._recent = deque(maxlen=window)
+        self.latency = LatencyHistogram()
+        self.requests = 0
+        self.hedged = 0
+        self.late_replies = 0
+        self.late_agreed = 0
+        self.late_errors = 0
+        self.primary_errors = 0
+        self.saved_ms = 0.0
+
+    def deadline_s(self):
+        return self._deadline()[0]
+
+    def _deadline(self):
+        """``(seconds, source)``; source is "fixed", "default" (warming up) or "observed"."""
+        if self.fixed_deadline_s is not None:
+            return self.fixed_deadline_s, "fixed"
+        with self._lock:
+            if len(self._recent) < self.warmup:
+                return self.default_deadline_s, "default"
+            observed = float(np.quantile(self._recent, self.quantile))
+        return min(max(observed, self.min_deadline_s), self.max_deadline_s), "observed"
+
+    def predict(self, records):
+        start = time.perf_counter()
+        deadline = self.deadline_s()
+        primary = self._pool.submit(self._primary, records)
+        primary.add_done_callback(lambda done: self._record_primary(done, time.perf_counter() - start))
+        with self._lock:
+            self.requests += 1
+
+        try:
+            failed = primary.exception(timeout=deadline) is not None
+        except TimeoutError:
+            pass
+        else:
+            if failed:
+                with self._lock:
+                    self.primary_errors += 1
+            return primary.result()
+
+        try:
+            served = self._fallback(records)
+        except Exception:
+            # Fallback broke too; the primary is the only answer left.
+            if primary.exception() is not None:
+                with self._lock:
+                    self.primary_errors += 1
+            return primary.result()
+        served_s = time.perf_counter() - start
+        with self._lock:
+            self.hedged += 1
+
+        primary.add_done_callback(lambda _: self._record_late(primary, served, served_s, start))
+        return {**served, "fallback": True, "deadline_s": deadline}
+
+    def _record_primary(self, primary, elapsed):
+        # Successful replies (on time or late) feed the deadline estimate;
+        # fast failures would otherwise drag it down. Failures are counted
+        # once, in ``predict`` or ``_record_late``.
+        if primary.exception() is not None:
+            return
+        with self._lock:
+            self._recent.append(elapsed)
+            self.latency.record(elapsed)
+
+    def _record_late(self, primary, served, served_s, start):
+        elapsed = time.perf_counter() - start
+        with self._lock:
+            # Time the caller would have waited, whether the primary answered or failed.
+            self.saved_ms += max(elapsed - served_s, 0.0) * 1000.0
+            if primary.exception() is not None:
+                self.late_errors += 1
+                return
+            self.late_replies += 1
+            try:
+                if primary.result()["predictions"] == served["predictions"]:
+                    self.late_agreed += 1
+            except (KeyError, TypeError):
+                pass
+
+    def summary(self):
+        deadline, source = self._deadline()
+        with self._lock:
+            finished_late = self.late_replies + self.late_errors
+            return {
+                "requests": self.requests,
+                "hedged": self.hedged,
+                "hedge_rate": self.hedged / self.requests if self.requests else None,
+                "deadline_ms": deadline * 1000.0,
+                "deadline_source": source,
+                "deadline_samples": len(self._recent),
+                "late_replies": self.late_replies,
+                "late_errors": self.late_errors,
+                "primary_errors": self.primary_errors,
+                "late_agreement_rate": self.late_agreed / self.late_replies if self.late_replies else None,
+                "saved_ms_total": self.saved_ms,
+                "saved_ms_mean": self.saved_ms / finished_late if finished_late else None,
+            }
@@ -0,0 +1,96 @@
+import itertools
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from cube import ALL, DIMENSIONS, MISSING, CohortCube
+from scoring import confidence_tier
+
+
+def _frame(n, seed):
+    rng = np.random.default_rng(seed)
+    frame = pd.DataFrame({
+        "industry": rng.choice(["Tech", "Legal", "Retail"], n),
+        "region": rng.choice(["North", "South", "West"], n),
+        "company_size": rng.choice(["Small", "Medium", "Large"], n),
+        "channel": rng.choice(["email", "sms"], n),
+        "prediction": rng.integers(0, 2, n),
+        "heuristic_score": rng.integers(5, 96, n),
+        "probability": rng.random(n),
+    })
+    frame.loc[rng.random(n) < 0.2, "probability"] = np.nan
+    return frame
+
+
+@pytest.fixture(scope="module")
+def scored():
+    # Two batches, the second bringing values the cube has not seen yet.
+    first = _frame(500, seed=0)
+    second = _frame(300, seed=1)
+    second.loc[:49, "industry"] = "Health"
+    second.loc[50:99, "channel"] = "phone"
+
+    cube = CohortCube()
+    cube.update(first)
+    cube.update(second)
+    return cube, pd.concat([first, second], ignore_index=True)
+
+
+def _expected(frame):
+    tiers = frame["heuristic_score"].map(confidence_tier)
+    return {
+        "contacts": len(frame),
+        "predicted_renew": int(frame["prediction"].sum()),
+        "renew_rate": frame["prediction"].mean(),
+        "mean_heuristic_score": frame["heuristic_score"].mean(),
+        "mean_probability": frame["probability"].mean(),
+        **{f"{tier} confidence": int((tiers == tier).sum()) for tier in ("High", "Medium", "Low")},
+    }
+
+
+def test_cells_match_groupby(scored):
+    cube, frame = scored
+    choices = [[ALL] + sorted(frame[dim].unique()) for dim in DIMENSIONS]
+    for combo in itertools.product(*choices):
+        filters = {dim: value for dim, value in zip(DIMENSIONS, combo) if value != ALL}
+        mask = np.ones(len(frame), dtype=bool)
+        for dim, value in filters.items():
+            mask &= frame[dim].to_numpy() == value
+        subset = frame[mask]
+
+        cell = cube.cell(**filters)
+        if subset.empty:
+            assert cell["contacts"] == 0
+            continue
+        for key, value in _expected(subset).items():
+            assert cell[key] == pytest.approx(value, nan_ok=True), (filters, key)
+
+
+def test_breakdown_matches_groupby(scored):
+    cube, frame = scored
+    subset = frame[frame["region"] == "South"]
+    breakdown = cube.breakdown("industry", region="South")
+
+    assert breakdown.loc[ALL, "contacts"] == len(subset)
+    expected = subset.groupby("industry")["prediction"].agg(["size", "sum"])
+    for industry, row in expected.iterrows():
+        assert breakdown.loc[industry, "contacts"] == row["size"]
+        assert breakdown.loc[industry, "predicted_renew"] == row["sum"]
+
+
+def test_unknown_filter_value_is_empty(scored):
+    cube, _ = scored
+    assert cube.cell(industry="Aerospace")["contacts"] == 0
+    assert cube.breakdown("region", industry="Aerospace").empty
+
+
+def test_missing_dimension_values_get_their_own_slot():
+    frame = _frame(2, seed=2)
+    frame["industry"] = ["Retail", None]
+    cube = CohortCube()
+    cube.update(frame)
+
+    assert cube.cell(industry="Retail")["contacts"] == 1
+    assert cube.cell(industry=MISSING)["contacts"] == 1
+    assert cube.cell()["contacts"] == 2
@@ -0,0 +1,107 @@
+import json
+import math
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from drift import MISSING, DriftMonitor, DriftSketch, compare, ks, psi
+
+
+def _raw_frame(n, seed):
+    """Upload-like rows: labels, blanks, text and out-of-range values mixed in."""
+    rng = np.random.default_rng(seed)
+    frame = pd.DataFrame({
+        "industry": rng.choice(["Tech", "Retail", "Mining", None], n),
+        "region": rng.choice(["South", "West"], n),
+        "company_size": rng.choice(["Small", "Enterprise"], n),
+        "tenure_months": rng.choice(["12", "x", "250", "-3", None], n),
+        "is_current_customer": rng.choice(["Yes", "no", "1", "0", "?"], n),
+        "avg_response_time_hours": rng.choice([3.5, 100.0, 150.0, np.nan, np.inf], n),
+        "emails_sent_last_30d": rng.integers(0, 120, n),
+    })
+    # No "channel" column and no other numeric columns: counted as missing.
+    return frame
+
+
+def test_observe_matches_update():
+    frame = _raw_frame(500, seed=0)
+    batch = DriftSketch()
+    batch.update(frame)
+    per_record = DriftSketch()
+    for record in frame.to_dict("records"):
+        per_record.observe(record)
+
+    assert batch.to_dict() == per_record.to_dict()
+    assert sum(batch.categorical["industry"].values()) == batch.count
+    assert batch.categorical["channel"] == {MISSING: 500}
+
+
+def test_yes_no_labels_bin_like_numbers():
+    labels, numbers = DriftSketch(), DriftSketch()
+    labels.update(pd.DataFrame({"tag_new_lead": ["Yes", " no ", "TRUE"]}))
+    numbers.update(pd.DataFrame({"tag_new_lead": [1, 0, 1]}))
+
+    assert labels.numeric["tag_new_lead"] == numbers.numeric["tag_new_lead"]
+    assert labels.missing["tag_new_lead"] == 0
+
+
+def test_sketch_round_trips_through_json():
+    sketch = DriftSketch()
+    sketch.update(_raw_frame(200, seed=1))
+
+    restored = DriftSketch.from_dict(json.loads(json.dumps(sketch.to_dict())))
+    assert restored.to_dict() == sketch.to_dict()
+
+    data = sketch.to_dict()
+    data["edges"] = {**data["edges"], "tenure_months": [0.0, 1.0]}
+    with pytest.raises(ValueError):
+        DriftSketch.from_dict(data)
+
+
+def test_merge_equals_single_update():
+    first, second = _raw_frame(100, seed=2), _raw_frame(150, seed=3)
+    merged = DriftSketch()
+    merged.update(first)
+    other = DriftSketch()
+    other.update(second)
+    merged.merge(other)
+
+    single = DriftSketch()
+    single.update(pd.concat([first, second], ignore_index=True))
+    assert merged.to_dict() == single.to_dict()
+
+
+def test_psi_and_ks_on_known_vectors():
+    assert psi([50, 50], [25, 75]) == pytest.approx(0.25 * math.log(2) - 0.25 * math.log(2 / 3))
+    assert psi([10, 30], [1, 3]) == pytest.approx(0.0)
+    assert ks([50, 50], [25, 75]) == pytest.approx(0.25)
+    assert ks([0, 10], [10, 0]) == pytest.approx(1.0)
+    assert psi([0, 0], [1, 1]) is None
+    assert ks([1, 1], [0, 0]) is None
+
+
+def test_unparseable_numeric_column_is_drift():
+    reference = DriftSketch()
+    reference.update(pd.DataFrame({"tenure_months": np.arange(100) % 50, "industry": ["Tech"] * 100}))
+    current = DriftSketch()
+    current.update(pd.DataFrame({"tenure_months": ["n/a"] * 100, "industry": [None] * 100}))
+
+    report = compare(current, reference)
+    assert report.loc["tenure_months", "status"] == "drift"
+    assert report.loc["industry", "status"] == "drift"
+    # Absent in both: the missing bins match.
+    assert report.loc["total_tickets_last_6mo", "status"] == "stable"
+
+
+def test_monitor_windows():
+    monitor = DriftMonitor(window_seconds=60, max_windows=2)
+    frame = _raw_frame(10, seed=4)
+    monitor.update(frame, now=0)
+    monitor.observe(frame.iloc[0].to_dict(), now=30)
+    monitor.update(frame, now=60)
+    monitor.update(frame, now=120)
+
+    assert monitor.windows() == [(60, 10), (120, 10)]
+    assert monitor.merged().count == 20
+    assert monitor.report() is None
@@ -0,0 +1,141 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from schema import REASON_COLUMN, InputSchema
+
+
+CATEGORIES = {"industry": ["Retail", "Tech"], "channel": ["email", "sms"]}
+RANGES = {"tenure_months": (0, 200), "is_current_customer": (0, 1), "avg_response_time_hours": (0.0, 100.0)}
+COLUMNS = ["industry", "tenure_months", "is_current_customer", "avg_response_time_hours", "channel"]
+
+
+@pytest.fixture(scope="module")
+def schema():
+    return InputSchema(COLUMNS, CATEGORIES, RANGES)
+
+
+def _row_reasons(row):
+    """Per-row reference for the reasons ``validate`` should report."""
+    reasons = []
+    for col in COLUMNS:
+        value = row[col]
+        if col in CATEGORIES:
+            if pd.isna(value):
+                reasons.append(f"{col}: missing")
+            elif str(value).strip() not in CATEGORIES[col]:
+                reasons.append(f"{col}: unknown category")
+            continue
+
+        if isinstance(value, str) and col == "is_current_customer":
+            value = {"yes": 1, "no": 0}.get(value.strip().lower(), value)
+        try:
+            number = float(value)
+        except (TypeError, ValueError):
+            number = np.nan
+        low, high = RANGES[col]
+        if np.isnan(number):
+            reasons.append(f"{col}: not numeric")
+            continue
+        if np.isinf(number):
+            reasons.append(f"{col}: not finite")
+            continue
+        if number < low or number > high:
+            reasons.append(f"{col}: out of range")
+        if isinstance(low, int) and number != np.floor(number):
+            reasons.append(f"{col}: not an integer")
+    return reasons
+
+
+def _mixed_frame():
+    return pd.DataFrame({
+        "industry": ["Retail", " Tech ", "Mining", None, "Tech", "Retail", "Tech", "Retail"],
+        "tenure_months": ["12", "x", "250", "3", "1.5", "7", "inf", "-1"],
+        "is_current_customer": ["Yes", "no", "2", "1", "0", "maybe", "1", "0"],
+        "avg_response_time_hours": [3.5, 100.0, 0.0, np.nan, 50.0, -0.5, np.inf, 1.0],
+        "channel": ["email", "sms", "sms", "email", "fax", "email", "sms", None],
+    })
+
+
+def test_rejects_match_per_row_reference(schema):
+    frame = _mixed_frame()
+    result = schema.validate(frame)
+
+    expected = [_row_reasons(row) for _, row in frame.iterrows()]
+    np.testing.assert_array_equal(result.reject_mask, [bool(reasons) for reasons in expected])
+    for index, reason in result.rejects[REASON_COLUMN].items():
+        # Reasons come out in column-then-check order, like the reference.
+        assert reason.split("; ") == expected[index], index
+    assert list(result.valid.index) == [i for i, reasons in enumerate(expected) if not reasons]
+
+
+def test_reason_grouping_with_many_patterns(schema):
+    # Enough rows and distinct failure combinations to exercise the packed-bits grouping.
+    rng = np.random.default_rng(0)
+    n = 2_000
+    frame = pd.DataFrame({
+        "industry": rng.choice(["Retail", "Tech", "Mining", None], n),
+        "tenure_months": rng.choice([5, 12.5, -3, 400, np.nan], n),
+        "is_current_customer": rng.choice(["1", "0", "Yes", "No", "7", "?"], n),
+        "avg_response_time_hours": rng.choice([1.0, 150.0, np.inf, np.nan], n),
+        "channel": rng.choice(["email", "sms", "fax"], n),
+    })
+    result = schema.validate(frame)
+    reasons = result.rejects[REASON_COLUMN]
+    for index, row in frame.loc[result.reject_mask].iterrows():
+        assert reasons[index].split("; ") == _row_reasons(row), index
+
+
+def test_valid_rows_are_coerced(schema):
+    frame = pd.DataFrame({
+        "industry": ["Retail", " Tech "],
+        "tenure_months": ["12", 7.0],
+        "is_current_customer": ["Yes", "no"],
+        "avg_response_time_hours": ["3.5", 100],
+        "channel": ["email", "sms"],
+    })
+    valid = schema.validate(frame).valid
+
+    assert list(valid.columns) == COLUMNS
+    assert valid["tenure_months"].dtype == np.int64
+    assert valid["is_current_customer"].dtype == np.int64
+    assert valid["avg_response_time_hours"].dtype == np.float64
+    assert valid["tenure_months"].tolist() == [12, 7]
+    assert valid["is_current_customer"].tolist() == [1, 0]
+    assert valid["industry"].tolist() == ["Retail", "Tech"]
+
+
+def test_int64_overflow_is_rejected():
+    schema = InputSchema(["contact_id"], {}, {"contact_id": (0, None)})
+    frame = pd.DataFrame({"contact_id": [1.0, 2.0 ** 63, 2.0 ** 62]})
+    result = schema.validate(frame)
+
+    np.testing.assert_array_equal(result.reject_mask, [False, True, False])
+    assert result.rejects[REASON_COLUMN].tolist() == ["contact_id: exceeds int64"]
+    assert result.valid["contact_id"].tolist() == [1, 2 ** 62]
+
+
+def test_missing_column_rejects_every_row(schema):
+    frame = _mixed_frame().drop(columns="channel").iloc[:2]
+    result = schema.validate(frame)
+
+    assert result.reject_mask.all()
+    assert all(reason.endswith("channel: missing column") for reason in result.rejects[REASON_COLUMN])
+    assert result.valid.empty
+
+
+def test_unknown_categories(schema):
+    frame = pd.DataFrame({
+        "industry": ["Mining", "Retail"],
+        "tenure_months": [1, 2],
+        "is_current_customer": [0, 1],
+        "avg_response_time_hours": [1.0, 2.0],
+        "channel": ["email", "sms"],
+    })
+
+    strict = schema.validate(frame)
+    assert strict.rejects[REASON_COLUMN].tolist() == ["industry: unknown category"]
+
+    lenient = schema.validate(frame, allow_unknown=True)
+    assert not lenient.reject_mask.any()
+    assert lenient.valid["industry"].tolist() == ["Mining", "Retail"]
@@ -0,0 +1,154 @@
+import time
+
+import pytest
+
+from scoring import HedgedScorer, LatencyHistogram, ShadowScorer
+
+
+def _backend(predictions, delay=0.0, error=None):
+    """Fake backend that sleeps, then answers or raises."""
+
+    def predict(records):
+        time.sleep(delay)
+        if error is not None:
+            raise error
+        return {"predictions": list(predictions)}
+
+    return predict
+
+
+def _wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out waiting for background bookkeeping"
+        time.sleep(0.01)
+
+
+RECORDS = [{"contact_id": 1}, {"contact_id": 2}]
+
+
+# ----------------------------------------------------
+# LatencyHistogram
+# ----------------------------------------------------
+def test_histogram_quantiles():
+    hist = LatencyHistogram(buckets_ms=(10, 100))
+    assert hist.quantile_ms(0.5) is None
+    assert hist.format_ms(hist.quantile_ms(0.5)) == "—"
+
+    for seconds in (0.005, 0.005, 0.05, 0.5):
+        hist.record(seconds)
+    assert hist.counts == [2, 1, 1]
+    assert hist.mean_ms() == pytest.approx(140.0)
+    assert hist.quantile_ms(0.5) == 10
+    assert hist.quantile_ms(0.75) == 100
+    assert hist.quantile_ms(0.95) == float("inf")
+    assert hist.format_ms(hist.quantile_ms(0.95)) == ">100 ms"
+    assert list(hist.to_frame()["count"]) == [2, 1, 1]
+
+
+# ----------------------------------------------------
+# ShadowScorer
+# ----------------------------------------------------
+def test_shadow_latency_does_not_reach_caller():
+    scorer = ShadowScorer(_backend([1, 0]), _backend([1, 0], delay=0.5))
+
+    start = time.perf_counter()
+    assert scorer.predict(RECORDS) == {"predictions": [1, 0]}
+    assert time.perf_counter() - start < 0.3
+
+    _wait_for(lambda: scorer.summary()["compared"] == 2)
+    assert scorer.summary()["agreement_rate"] == 1.0
+
+
+def test_busy_shadow_pool_does_not_queue_primary():
+    scorer = ShadowScorer(_backend([1, 0]), _backend([1, 0], delay=0.5), max_workers=1)
+    scorer.predict(RECORDS)
+
+    # The only pool worker is still busy with the first shadow call.
+    start = time.perf_counter()
+    scorer.predict(RECORDS)
+    assert time.perf_counter() - start < 0.3
+
+
+def test_disagreement_is_logged():
+    scorer = ShadowScorer(_backend([1, 0]), _backend([1, 1]))
+    scorer.predict(RECORDS)
+
+    _wait_for(lambda: scorer.summary()["compared"] == 2)
+    assert scorer.summary()["agreement_rate"] == 0.5
+    disagreements = scorer.disagreement_frame()
+    assert disagreements["contact_id"].tolist() == [2]
+    assert disagreements[["remote", "local"]].values.tolist() == [[0, 1]]
+
+
+def test_errors_are_counted_per_backend():
+    scorer = ShadowScorer(_backend([1]), _backend([1], error=RuntimeError("down")))
+    assert scorer.predict(RECORDS[:1]) == {"predictions": [1]}
+    _wait_for(lambda: scorer.summary()["errors"]["local"] == 1)
+    assert scorer.summary()["compared"] == 0
+
+    failing = ShadowScorer(_backend([1], error=RuntimeError("down")), _backend([1]))
+    with pytest.raises(RuntimeError):
+        failing.predict(RECORDS[:1])
+    assert failing.summary()["errors"]["remote"] == 1
+
+
+# ----------------------------------------------------
+# HedgedScorer
+# ----------------------------------------------------
+def test_fast_primary_is_served():
+    scorer = HedgedScorer(_backend([1]), _backend([0]), deadline_s=0.5)
+    assert scorer.predict(RECORDS[:1]) == {"predictions": [1]}
+
+    summary = scorer.summary()
+    assert summary["hedged"] == 0
+    assert summary["deadline_source"] == "fixed"
+
+
+def test_slow_primary_falls_back_and_late_reply_is_recorded():
+    scorer = HedgedScorer(_backend([1], delay=0.4), _backend([0]), deadline_s=0.05)
+
+    start = time.perf_counter()
+    response = scorer.predict(RECORDS[:1])
+    assert time.perf_counter() - start < 0.3
+    assert response == {"predictions": [0], "fallback": True, "deadline_s": 0.05}
+
+    _wait_for(lambda: scorer.summary()["late_replies"] == 1)
+    summary = scorer.summary()
+    assert summary["hedged"] == 1
+    assert summary["late_agreement_rate"] == 0.0
+    assert summary["saved_ms_total"] > 200
+    assert summary["deadline_samples"] == 1
+
+
+def test_failures_are_counted_once_and_kept_out_of_the_deadline():
+    scorer = HedgedScorer(_backend([1], error=RuntimeError("down")), _backend([0]), deadline_s=0.5)
+    with pytest.raises(RuntimeError):
+        scorer.predict(RECORDS[:1])
+
+    late = HedgedScorer(_backend([1], delay=0.3, error=RuntimeError("down")), _backend([0]), deadline_s=0.05)
+    assert late.predict(RECORDS[:1])["fallback"] is True
+    _wait_for(lambda: late.summary()["late_errors"] == 1)
+
+    summary, late_summary = scorer.summary(), late.summary()
+    assert (summary["primary_errors"], summary["late_errors"]) == (1, 0)
+    assert (late_summary["primary_errors"], late_summary["late_errors"]) == (0, 1)
+    # A failed late reply still saved the caller its wait.
+    assert late_summary["saved_ms_total"] > 150
+    assert late_summary["saved_ms_mean"] == late_summary["saved_ms_total"]
+    assert summary["deadline_samples"] == late_summary["deadline_samples"] == 0
+
+
+def test_deadline_warms_up_then_tracks_observed_latency():
+    scorer = HedgedScorer(_backend([1], delay=0.01), _backend([0]), warmup=3, default_deadline_s=2.0,
+                          min_deadline_s=0.0)
+    assert scorer.summary()["deadline_source"] == "default"
+    assert scorer.deadline_s() == 2.0
+
+    for _ in range(3):
+        scorer.predict(RECORDS[:1])
+    _wait_for(lambda: scorer.summary()["deadline_samples"] == 3)
+
+    summary = scorer.summary()
+    assert summary["deadline_source"] == "observed"
+    assert 5 <= summary["deadline_ms"] < 500
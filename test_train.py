@@ -0,0 +1,43 @@
+import numpy as np
+import pytest
+from sklearn.metrics import roc_auc_score
+from sklearn.preprocessing import StandardScaler
+
+from train import AUC_BINS, _auc, _merge_scalers
+
+
+def test_merge_scalers_matches_full_fit():
+    rng = np.random.default_rng(0)
+    # Uneven shards with different locations and scales.
+    shards = [rng.normal(loc, scale, size=(n, 3)) for loc, scale, n in ((0, 1, 10), (5, 3, 1000), (-2, 0.5, 257))]
+
+    parts = []
+    for shard in shards:
+        scaler = StandardScaler().fit(shard)
+        parts.append((scaler.n_samples_seen_, scaler.mean_, scaler.var_))
+    n, mean, var = _merge_scalers(parts)
+
+    full = StandardScaler().fit(np.concatenate(shards))
+    assert np.all(n == full.n_samples_seen_)
+    np.testing.assert_allclose(mean, full.mean_)
+    np.testing.assert_allclose(var, full.var_)
+
+
+def test_auc_matches_roc_auc_score():
+    rng = np.random.default_rng(1)
+    y = rng.integers(0, 2, 5000)
+    # Scores on bin centres so the histogram loses no ordering information;
+    # ties within a bin are scored as half, like roc_auc_score does.
+    bins = np.clip((rng.normal(0.5 + 0.1 * y, 0.15) * AUC_BINS).astype(np.int64), 0, AUC_BINS - 1)
+    proba = (bins + 0.5) / AUC_BINS
+
+    hist = np.zeros((2, AUC_BINS), dtype=np.int64)
+    np.add.at(hist, (y, bins), 1)
+
+    assert _auc(hist) == pytest.approx(roc_auc_score(y, proba))
+
+
+def test_auc_needs_both_classes():
+    hist = np.zeros((2, AUC_BINS), dtype=np.int64)
+    hist[1, 10] = 5
+    assert _auc(hist) is None
@@ -0,0 +1,433 @@
+"""Out-of-core retraining for the retention model.
+
+Refits the same preprocessing + logistic model as ``best_retention_model.joblib``
+on interaction histories that do not fit in memory, and writes a new versioned
+artifact next to a JSON report with holdout metrics and throughput.
+
+    python train.py --input "data/interactions_*.csv" --target renewed --n-jobs 4
+
+How it works:
+
+- Inputs are CSV files. Uncompressed files are cut into line-aligned byte
+  ranges, so even a single large file is spread over ``--n-jobs`` worker
+  processes. (Quoted fields must not contain newlines.)
+- Each worker streams its ranges in ``--chunksize`` row chunks and runs them
+  through the ``InputSchema`` of the current artifact, checking types and
+  lower bounds only. The sidebar's upper bounds are UI limits, not data
+  limits. Unseen categories are kept and encoded as all zeros, like the
+  current ``OneHotEncoder`` does. Other bad rows are skipped and counted
+  per reason in the report.
+- Pass 1 merges per-worker ``StandardScaler`` statistics. The category
+  vocabularies are copied from the current encoder, unchanged. The same
+  pass builds a ``DriftSketch`` of the training rows. It is saved as the
+  drift monitor's reference snapshot.
+- Each epoch, every worker continues an ``SGDClassifier(loss="log_loss")``
+  from the shared weights with ``partial_fit``. The workers' weights are
+  then averaged, weighted by the rows each one saw.
+- A final pass scores the holdout rows with both the new and the current
+  artifact.
+
+Holdout rows are picked by hashing ``contact_id``, so every pass agrees on
+the split without keeping any state.
+"""
+
+import argparse
+import copy
+import glob
+import io
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import joblib
+import numpy as np
+import pandas as pd
+import sklearn
+from sklearn.compose import ColumnTransformer
+from sklearn.linear_model import SGDClassifier
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import OneHotEncoder, StandardScaler
+
+from drift import DriftSketch
+from schema import REASON_COLUMN, SIDEBAR_RANGES, InputSchema
+
+
+DEFAULT_MODEL_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "best_retention_model.joblib")
+
+# Resolution of the streaming ROC AUC estimate.
+AUC_BINS = 1000
+
+# Historical data is not clipped to the sidebar widgets: keep the lower
+# bounds (and integer-ness) but drop the upper ones.
+TRAINING_RANGES = {col: (low, None) for col, (low, _) in SIDEBAR_RANGES.items()}
+
+# Rows kept from the scan pass to set up the ColumnTransformer.
+SAMPLE_ROWS = 1_000
+
+
+# ----------------------------------------------------
+# Input shards
+# ----------------------------------------------------
+class _FileSlice(io.RawIOBase):
+    """Read-only view of bytes [start, end) of a file."""
+
+    def __init__(self, path, start, end):
+        self._file = open(path, "rb")
+        self._file.seek(start)
+        self._remaining = end - start
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        size = min(len(buffer), self._remaining)
+        if size <= 0:
+            return 0
+        read = self._file.readinto(memoryview(buffer)[:size])
+        self._remaining -= read
+        return read
+
+    def close(self):
+        self._file.close()
+        super().close()
+
+
+def plan_shards(paths, n_shards):
+    """Split input files into roughly ``n_shards`` line-aligned byte ranges.
+
+    Returns ``(path, start, end, header)`` tuples; ``start``/``end`` are None
+    for compressed files, which are always read whole.
+    """
+    plain = [path for path in paths if path.endswith(".csv")]
+    total = sum(os.path.getsize(path) for path in plain) or 1
+    shards = []
+    for path in paths:
+        if path not in plain:
+            shards.append((path, None, None, None))
+            continue
+
+        size = os.path.getsize(path)
+        with open(path, "rb") as handle:
+            header_line = handle.readline()
+            header = pd.read_csv(io.BytesIO(header_line), nrows=0).columns.tolist()
+            data_start = handle.tell()
+
+            pieces = max(1, round(n_shards * size / total))
+            cuts = [data_start]
+            for i in range(1, pieces):
+                handle.seek(max(data_start, size * i // pieces))
+                handle.readline()  # move to the next line boundary
+                cuts.append(min(handle.tell(), size))
+            cuts.append(size)
+
+        for start, end in zip(cuts, cuts[1:]):
+            if end > start:
+                shards.append((path, start, end, header))
+    return shards
+
+
+def _read_shard(shard, chunksize):
+    path, start, end, header = shard
+    if start is None:
+        return pd.read_csv(path, chunksize=chunksize)
+    buffer = io.BufferedReader(_FileSlice(path, start, end))
+    return pd.read_csv(buffer, names=header, header=None, chunksize=chunksize)
+
+
+def _iter_rows(shards, schema, target, holdout, chunksize, stats):
+    """Yield ``(features, labels, is_holdout)`` per validated chunk."""
+    threshold = int(holdout * 10_000)
+    for shard in shards:
+        for chunk in _read_shard(shard, chunksize):
+            stats["rows"] += len(chunk)
+            result = schema.validate(chunk, allow_unknown=True)
+
+            labels = pd.to_numeric(chunk[target], errors="coerce") if target in chunk else pd.Series(np.nan, index=chunk.index)
+            labels = labels.loc[result.valid.index].to_numpy()
+            labelled = np.isin(labels, (0, 1))
+            stats["rejected"] += len(result.rejects) + int((~labelled).sum())
+
+            reasons = stats["reject_reasons"]
+            for combined, n in result.rejects[REASON_COLUMN].value_counts().items():
+                for reason in combined.split("; "):
+                    reasons[reason] = reasons.get(reason, 0) + int(n)
+            if not labelled.all():
+                reason = f"{target}: missing or not 0/1"
+                reasons[reason] = reasons.get(reason, 0) + int((~labelled).sum())
+
+            features = result.valid.loc[labelled]
+            labels = labels[labelled].astype(np.int64)
+            is_holdout = pd.util.hash_array(features["contact_id"].to_numpy()) % 10_000 < threshold
+            yield features, labels, is_holdout
+
+
+# ----------------------------------------------------
+# Worker passes (run in separate processes)
+# ----------------------------------------------------
+def _scan_worker(shards, schema, target, holdout, chunksize, numeric):
+    """Pass 1: scaler statistics, label counts and a drift sketch over training rows."""
+    stats = {"rows": 0, "rejected": 0, "reject_reasons": {}, "train": 0, "holdout": 0, "positives": 0}
+    scaler = StandardScaler()
+    sketch = DriftSketch()
+    for features, labels, is_holdout in _iter_rows(shards, schema, target, holdout, chunksize, stats):
+        stats["holdout"] += int(is_holdout.sum())
+        train = ~is_holdout
+        if train.any():
+            scaler.partial_fit(features.loc[train, numeric].to_numpy(dtype=np.float64))
+            sketch.update(features.loc[train])
+            if "sample" not in stats:
+                stats["sample"] = features.loc[train].head(SAMPLE_ROWS)
+            stats["train"] += int(train.sum())
+            stats["positives"] += int(labels[train].sum())
+    if stats["train"]:
+        stats["scaler"] = (scaler.n_samples_seen_, scaler.mean_, scaler.var_)
+    stats["sketch"] = sketch
+    return stats
+
+
+def _fit_worker(shards, schema, target, holdout, chunksize, preprocess, model):
+    """One epoch of ``partial_fit`` over this worker's training rows."""
+    stats = {"rows": 0, "rejected": 0, "reject_reasons": {}, "train": 0}
+    model = copy.deepcopy(model)
+    for features, labels, is_holdout in _iter_rows(shards, schema, target, holdout, chunksize, stats):
+        train = ~is_holdout
+        if train.any():
+            model.partial_fit(preprocess.transform(features.loc[train]), labels[train], classes=np.array([0, 1]))
+            stats["train"] += int(train.sum())
+    return model, stats
+
+
+def _evaluate_worker(shards, schema, target, holdout, chunksize, pipelines):
+    """Holdout pass: mergeable metric counts for each named pipeline."""
+    stats = {"rows": 0, "rejected": 0, "reject_reasons": {}, "holdout": 0}
+    counts = {
+        name: {"log_loss": 0.0, "correct": 0, "hist": np.zeros((2, AUC_BINS), dtype=np.int64)}
+        for name in pipelines
+    }
+    for features, labels, is_holdout in _iter_rows(shards, schema, target, holdout, chunksize, stats):
+        if not is_holdout.any():
+            continue
+        rows, y = features.loc[is_holdout], labels[is_holdout]
+        stats["holdout"] += len(y)
+        for name, pipeline in pipelines.items():
+            proba = np.clip(pipeline.predict_proba(rows)[:, 1], 1e-15, 1 - 1e-15)
+            c = counts[name]
+            c["log_loss"] += float(-(y * np.log(proba) + (1 - y) * np.log(1 - proba)).sum())
+            c["correct"] += int(((proba >= 0.5) == y).sum())
+            bins = np.minimum((proba * AUC_BINS).astype(np.int64), AUC_BINS - 1)
+            np.add.at(c["hist"], (y, bins), 1)
+    stats["counts"] = counts
+    return stats
+
+
+# ----------------------------------------------------
+# Merging helpers
+# ----------------------------------------------------
+def _merge_scalers(parts):
+    """Combine (n, mean, var) triples with the parallel variance formula."""
+    n = np.zeros_like(parts[0][1])
+    mean = np.zeros_like(parts[0][1])
+    m2 = np.zeros_like(parts[0][1])
+    for count, part_mean, part_var in parts:
+        delta = part_mean - mean
+        total = n + count
+        mean = mean + delta * count / total
+        m2 = m2 + part_var * count + delta ** 2 * n * count / total
+        n = total
+    return n, mean, m2 / n
+
+
+def _average_models(models, weights):
+    merged = copy.deepcopy(models[0])
+    weights = np.asarray(weights, dtype=np.float64) / np.sum(weights)
+    merged.coef_ = sum(w * m.coef_ for w, m in zip(weights, models))
+    merged.intercept_ = sum(w * m.intercept_ for w, m in zip(weights, models))
+    merged.t_ = float(sum(w * m.t_ for w, m in zip(weights, models)))
+    return merged
+
+
+def _auc(hist):
+    negatives, positives = hist
+    n_neg, n_pos = negatives.sum(), positives.sum()
+    if not n_neg or not n_pos:
+        return None
+    below = np.cumsum(negatives) - negatives
+    return float((positives * (below + 0.5 * negatives)).sum() / (n_pos * n_neg))
+
+
+def _summarise_metrics(counts, n):
+    if not n:
+        return None
+    return {
+        "log_loss": counts["log_loss"] / n,
+        "accuracy": counts["correct"] / n,
+        "roc_auc": _auc(counts["hist"]),
+    }
+
+
+# ----------------------------------------------------
+# Training driver
+# ----------------------------------------------------
+def build_preprocess(current, sample, scaler_stats):
+    """Preprocessing with the current vocabularies and the streamed scaler."""
+    schema_columns = list(current.feature_names_in_)
+    old = current.named_steps["preprocess"]
+    categorical, categories = [], []
+    for _, transformer, cols in old.transformers_:
+        if hasattr(transformer, "categories_"):
+            categorical.extend(cols)
+            categories.extend(transformer.categories_)
+    numeric = [col for col in schema_columns if col not in categorical]
+
+    preprocess = ColumnTransformer([
+        ("categorical", OneHotEncoder(categories=categories, handle_unknown="ignore"), categorical),
+        ("numeric", StandardScaler(), numeric),
+    ])
+    # Fitting on a sample only sets up column bookkeeping: the vocabularies
+    # are fixed above and the scaler statistics are overwritten next.
+    preprocess.fit(sample[schema_columns])
+    scaler = preprocess.named_transformers_["numeric"]
+    n, mean, var = scaler_stats
+    scaler.n_samples_seen_ = n.astype(np.int64)
+    scaler.mean_ = mean
+    scaler.var_ = var
+    scaler.scale_ = np.where(var > 0, np.sqrt(var), 1.0)
+    return preprocess
+
+
+def _run_pass(pool, worker, groups, *args):
+    start = time.perf_counter()
+    results = list(pool.map(worker, groups, *[[arg] * len(groups) for arg in args]))
+    seconds = time.perf_counter() - start
+    rows = sum(r["rows"] if isinstance(r, dict) else r[1]["rows"] for r in results)
+    return results, {"rows": rows, "seconds": seconds, "rows_per_second": rows / seconds if seconds else None}
+
+
+def train(input_glob, target, out_dir="models", model_path=DEFAULT_MODEL_PATH, n_jobs=None,
+          chunksize=100_000, epochs=3, holdout=0.1, alpha=1e-4, random_state=0):
+    """Run the full retraining and return the report dict."""
+    started = time.perf_counter()
+    paths = sorted(glob.glob(input_glob))
+    if not paths:
+        raise FileNotFoundError(f"No input files match {input_glob!r}")
+
+    n_jobs = n_jobs or os.cpu_count() or 1
+    current = joblib.load(model_path)
+    schema = InputSchema.from_pipeline(current, ranges=TRAINING_RANGES)
+    numeric = [col for col in schema.columns if col not in schema.categories]
+
+    shards = plan_shards(paths, n_jobs)
+    groups = [shards[i::n_jobs] for i in range(min(n_jobs, len(shards)))]
+    throughput = {}
+
+    with ProcessPoolExecutor(max_workers=len(groups)) as pool:
+        # Pass 1 — scaler statistics
+        scans, throughput["scan"] = _run_pass(pool, _scan_worker, groups, schema, target, holdout, chunksize, numeric)
+        parts = [scan["scaler"] for scan in scans if "scaler" in scan]
+        if not parts:
+            raise ValueError("No valid labelled training rows found")
+        scaler_stats = _merge_scalers(parts)
+
+        # Any worker that saw training rows kept a few valid ones.
+        sample = next(scan["sample"] for scan in scans if "sample" in scan)
+        preprocess = build_preprocess(current, sample, scaler_stats)
+
+        # Epochs — per-worker partial_fit, then weighted parameter averaging
+        model = SGDClassifier(loss="log_loss", alpha=alpha, random_state=random_state)
+        for epoch in range(epochs):
+            fitted, throughput[f"epoch_{epoch + 1}"] = _run_pass(
+                pool, _fit_worker, groups, schema, target, holdout, chunksize, preprocess, model
+            )
+            fitted = [(m, s["train"]) for m, s in fitted if s["train"]]
+            model = _average_models([m for m, _ in fitted], [n for _, n in fitted])
+
+        pipeline = Pipeline([("preprocess", preprocess), ("model", model)])
+
+        # Holdout — new artifact vs current artifact
+        evaluations, throughput["evaluate"] = _run_pass(
+            pool, _evaluate_worker, groups, schema, target, holdout, chunksize,
+            {"new": pipeline, "current": current},
+        )
+
+    n_holdout = sum(e["holdout"] for e in evaluations)
+    metrics = {}
+    for name in ("new", "current"):
+        merged = {"log_loss": 0.0, "correct": 0, "hist": np.zeros((2, AUC_BINS), dtype=np.int64)}
+        for evaluation in evaluations:
+            part = evaluation["counts"][name]
+            merged["log_loss"] += part["log_loss"]
+            merged["correct"] += part["correct"]
+            merged["hist"] += part["hist"]
+        metrics[name] = _summarise_metrics(merged, n_holdout)
+
+    version = time.strftime("%Y%m%d-%H%M%S")
+    os.makedirs(out_dir, exist_ok=True)
+    artifact = os.path.join(out_dir, f"retention_model_v{version}.joblib")
+    joblib.dump(pipeline, artifact)
+
+    reference = DriftSketch()
+    for scan in scans:
+        reference.merge(scan["sketch"])
+    reference_path = os.path.join(out_dir, f"retention_model_v{version}.reference.json")
+    with open(reference_path, "w") as handle:
+        json.dump(reference.to_dict(), handle)
+
+    train_rows = sum(scan["train"] for scan in scans)
+    reject_reasons = {}
+    for scan in scans:
+        for reason, n in scan["reject_reasons"].items():
+            reject_reasons[reason] = reject_reasons.get(reason, 0) + n
+    report = {
+        "version": version,
+        "artifact": artifact,
+        "drift_reference": reference_path,
+        "input": paths,
+        "target": target,
+        "sklearn_version": sklearn.__version__,
+        "feature_names_in": list(pipeline.feature_names_in_),
+        "rows": {
+            "read": sum(scan["rows"] for scan in scans),
+            "rejected": sum(scan["rejected"] for scan in scans),
+            "reject_reasons": dict(sorted(reject_reasons.items(), key=lambda item: -item[1])),
+            "train": train_rows,
+            "holdout": n_holdout,
+            "train_positive_rate": sum(scan["positives"] for scan in scans) / train_rows,
+        },
+        "holdout_metrics": metrics,
+        "throughput": {
+            "n_jobs": len(groups),
+            "shards": len(shards),
+            "chunksize": chunksize,
+            "epochs": epochs,
+            "passes": throughput,
+            "total_seconds": time.perf_counter() - started,
+        },
+    }
+    with open(os.path.join(out_dir, f"retention_model_v{version}.report.json"), "w") as handle:
+        json.dump(report, handle, indent=2)
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Retrain the retention model out of core.")
+    parser.add_argument("--input", required=True, help="CSV file or glob of CSV shards")
+    parser.add_argument("--target", required=True, help="0/1 label column")
+    parser.add_argument("--out-dir", default="models")
+    parser.add_argument("--model", default=DEFAULT_MODEL_PATH, help="current artifact (schema + vocabularies)")
+    parser.add_argument("--n-jobs", type=int, default=None, help="worker processes (default: all cores)")
+    parser.add_argument("--chunksize", type=int, default=100_000)
+    parser.add_argument("--epochs", type=int, default=3)
+    parser.add_argument("--holdout", type=float, default=0.1, help="fraction of contacts held out")
+    parser.add_argument("--alpha", type=float, default=1e-4, help="L2 regularisation strength")
+    args = parser.parse_args()
+
+    report = train(
+        args.input, args.target, out_dir=args.out_dir, model_path=args.model, n_jobs=args.n_jobs,
+        chunksize=args.chunksize, epochs=args.epochs, holdout=args.holdout, alpha=args.alpha,
+    )
+    print(json.dumps({key: report[key] for key in ("artifact", "rows", "holdout_metrics", "throughput")}, indent=2))
+
+
+if __name__ == "__main__":
+    main()